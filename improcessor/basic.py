@@ -25,6 +25,27 @@
 #
 # If there are no optional arguments, then do not pass anything.
 #
+# Images are expected to be numpy arrays.  The built-in functions work on
+# them directly, without first converting or copying them.
+#
+# The image passed to apply is handed to the first technique as is, since
+# all of the built-in functions return a new image.  A technique that
+# modifies its input in place should be flagged by setting the attribute
+# `inplace = True` on the function, in which case apply will first copy
+# the image when that technique is the first one in the sequence.
+#
+# Built-in functions that accept an `out` keyword write intermediate
+# results into scratch buffers kept by the instance, so that repeated
+# calls to apply do not reallocate them.  This is only done when the next
+# stage is also a built-in, so a technique of your own always receives a
+# new image that it may keep.  Consecutive stages alternate
+# between two sets of buffers, so a sequence of stages producing images
+# of the same size and type needs only two.  The image returned by apply
+# is never one of these buffers: should the last stage return its input,
+# or a view of it, the result is copied out.  Since the buffers belong to
+# the instance, apply is not reentrant: threads processing images at the
+# same time should each use their own instance.
+#
 # Possible functions include any function that exists in the class
 # invocation or function setting scope.
 #
@@ -34,6 +55,10 @@
 #    newimage = normalize(image)
 #    newimage = scale(image, (minval maxval))
 #    newimage = scaleabout(image, (anchorval diameter))
+#    newimage = resize(image, (width height))
+#
+# A cv2.resize stage given only the target size is run through the
+# built-in resize, so that it can also reuse its output buffer.
 #
 #
 #  IMPLEMENTATION:
@@ -84,9 +109,271 @@ import numpy as np
 import sys
 import inspect
 import types
+from functools import lru_cache
 
 import cv2
 
+try:
+  import numba
+  HAVE_NUMBA = True
+except ImportError:
+  HAVE_NUMBA = False
+
+# Images smaller than this are rescaled with plain numpy, since the
+# parallel kernels do not pay off on small inputs.  The kernels release
+# the GIL, so other python threads keep running while they execute.
+NUMBA_MINSIZE = 1 << 16
+
+if HAVE_NUMBA:
+
+  #============================ _minmax_kernel ===========================
+  #
+  # @brief  Single pass parallel min/max of a flat array. Also counts NaN
+  #         entries so that the caller can defer to numpy semantics.
+  #
+  @numba.njit(parallel=True, nogil=True, cache=True)
+  def _minmax_kernel(ivec):
+
+    mn = ivec[0]
+    mx = ivec[0]
+    nn = 0
+    for ii in numba.prange(ivec.size):
+      mn = min(mn, ivec[ii])
+      mx = max(mx, ivec[ii])
+      nn += ivec[ii] != ivec[ii]
+
+    return mn, mx, nn
+
+  #============================ _scale_kernel ============================
+  #
+  # @brief  Single pass parallel map of (ivec-mn)/rng*a + b, clamped to
+  #         [lo, hi] as np.clip does.
+  #
+  # The division is kept per element (no fastmath reciprocal) so that the
+  # image extrema map exactly onto b and a+b.  Used for outputs other than
+  # float32, see _scale32_kernel.
+  #
+  @numba.njit(parallel=True, nogil=True, cache=True)
+  def _scale_kernel(ivec, mn, rng, a, b, lo, hi, ovec):
+
+    for ii in numba.prange(ivec.size):
+      v = (ivec[ii] - mn)/rng*a + b
+      if v < lo:
+        v = lo
+      if v > hi:
+        v = hi
+      ovec[ii] = v
+
+  #=========================== _scale32_kernel ===========================
+  #
+  # @brief  Single pass parallel map of (ivec-mn)*k + b into a float32
+  #         array, clamped to [lo, hi] as np.clip does.
+  #
+  # Multiplying by k = a/rng instead of dividing by rng is over twice as
+  # fast.  The double precision error it adds is far below the float32
+  # rounding of the result, so the image extrema still map exactly onto
+  # b and a+b.
+  #
+  @numba.njit(parallel=True, nogil=True, cache=True)
+  def _scale32_kernel(ivec, mn, k, b, lo, hi, ovec):
+
+    for ii in numba.prange(ivec.size):
+      v = (ivec[ii] - mn)*k + b
+      if v < lo:
+        v = lo
+      if v > hi:
+        v = hi
+      ovec[ii] = v
+
+
+#============================== _floatType =============================
+#
+# @brief  The floating point type of a rescaled image.
+#
+# Single precision for float32 and for 8 or 16 bit integer images, which
+# it represents exactly, so as not to double the memory traffic by going
+# to float64.  Double precision otherwise.
+#
+def _floatType(dtype):
+
+  if dtype == np.float32 or (dtype.kind in 'iu' and dtype.itemsize <= 2):
+    return np.float32
+
+  return np.float64
+
+#=============================== _minmax ===============================
+#
+# @brief  Min and max of an image as floats, or None if it contains NaN.
+#
+# Only integer images go through the numba kernel.  For floating point
+# ones the NaN handling keeps it from vectorizing, and numpy is faster.
+#
+def _minmax(img):
+
+  if HAVE_NUMBA and img.size >= NUMBA_MINSIZE and img.dtype.kind in 'iu':
+    mn, mx, nn = _minmax_kernel(img.reshape(-1))
+    return None if nn > 0 else (float(mn), float(mx))
+
+  mn, mx = float(img.min()), float(img.max())
+  return None if np.isnan(mn) or np.isnan(mx) else (mn, mx)
+
+#============================= _affine_lut =============================
+#
+# @brief  The 256 entry lookup table of clamp((i-s)/r*A + B, lo, hi).
+#
+@lru_cache(maxsize=64)
+def _affine_lut(s, r, A, B, lo, hi, otype):
+
+  lut = (np.arange(256) - s)/r*A + B
+  lut = np.clip(lut, lo, hi).astype(otype)
+
+  return lut
+
+#=============================== _affine ===============================
+#
+# @brief  Compute clamp((img-s)/r*A + B, lo, hi) in a single pass.
+#
+# 8-bit images go through a lookup table (cv2.LUT), other large numeric
+# images through the numba kernel.  Only valid if _hasAffine(img).
+#
+def _affine(img, s, r, A, B, lo, hi, otype, out=None):
+
+  if img.dtype == np.uint8:
+    lut  = _affine_lut(float(s), float(r), float(A), float(B), \
+                       float(lo), float(hi), np.dtype(otype))
+    if out is not None and not out.flags.c_contiguous:
+      out = None                                # rejected by cv2 as dst
+    nimg = cv2.LUT(img, lut, dst=out)
+    return nimg if nimg.shape == img.shape else nimg.reshape(img.shape)
+
+  if out is None or out.shape != img.shape or out.dtype != otype \
+      or not out.flags.c_contiguous:          # the kernels write a flat view
+    out = np.empty(img.shape, dtype=otype)
+  if out.dtype == np.float32:
+    _scale32_kernel(img.reshape(-1), float(s), float(A)/float(r), \
+                    float(B), float(lo), float(hi), out.reshape(-1))
+  else:
+    _scale_kernel(img.reshape(-1), float(s), float(r), float(A), float(B), \
+                  float(lo), float(hi), out.reshape(-1))
+
+  return out
+
+#============================== _hasAffine =============================
+#
+# @brief  Whether _affine has a single pass implementation for the image.
+#
+def _hasAffine(img):
+
+  if img.dtype == np.uint8:
+    return img.ndim in (2, 3)
+
+  return HAVE_NUMBA and img.size >= NUMBA_MINSIZE and img.dtype.kind in 'iuf'
+
+#=============================== _rescale ==============================
+#
+# @brief  Linearly map the image range [min, max] to [b, a+b].  Shared
+#         implementation of the normalize, scale and scaleabout built-ins.
+#
+# Uses _affine when possible, numpy otherwise.  Constant or NaN-containing
+# images go through numpy.  The output array out is used if its shape and
+# type match.
+#
+def _rescale(img, a, b, out=None):
+
+  img   = np.asarray(img)
+  otype = _floatType(img.dtype)
+  if _hasAffine(img) and np.ndim(a) == 0 and np.ndim(b) == 0:
+    ext = _minmax(img)
+    if ext is not None and ext[1] > ext[0]:
+      return _affine(img, ext[0], ext[1]-ext[0], a, b, -np.inf, np.inf, \
+                     otype, out)
+
+  if out is not None and (out.shape != img.shape or out.dtype != otype):
+    out = None
+
+  minI  = img.min()
+  maxI  = img.max()
+  nimg  = np.subtract(img, minI, dtype=otype, out=out)
+  nimg /= float(maxI) - float(minI)
+  nimg *= a
+  nimg += b
+
+  return nimg
+
+
+#=============================== _isOneOf ==============================
+#
+# @brief  Whether fn is one of funcs.  Compares by identity, since the
+#         callables given by the user need not be hashable.
+#
+def _isOneOf(fn, funcs):
+
+  return any(fn is f for f in funcs)
+
+#============================== _pointwise =============================
+#
+# @brief  Apply a run of pointwise built-ins (clip, normalize, scale,
+#         scaleabout) in one pass, without intermediate images.
+#
+# Any such run collapses to a single clamp((x-s)/r*A + B, lo, hi).  The
+# min/max needed by each rescale are obtained by pushing the extrema of
+# the input through the stages that precede it, so one reduction over the
+# input suffices.  Falls back to running the stages one after the other
+# when that is not possible (constant, NaN-containing or non-numeric
+# images, or no kernel for the image type and size).
+#
+# @param[in]  img     The image to process.
+# @param[in]  ops     The stages as (op, p, q), see _POINTWISE.
+# @param[in]  run     The original (function, args) of the stages.
+# @param[in]  out     Optional output array, used if shape and type match.
+#
+def _pointwise(img, ops, run, out=None):
+
+  rescale = any(op == 1 for op, _, _ in ops)
+  fuse    = _hasAffine(img) or (not rescale and img.dtype.kind in 'iuf')
+  otype   = img.dtype
+  s, r, A, B, lo, hi = 0.0, 1.0, 1.0, 0.0, -np.inf, np.inf
+  if fuse and rescale:
+    ext  = _minmax(img)
+    fuse = ext is not None
+
+  for op, p, q in ops:
+    if not fuse:
+      break
+    if op == 0:
+      lo, hi = min(max(lo, p), q), min(max(hi, p), q)
+      otype  = np.result_type(otype, p, q)
+      continue
+
+    # Extrema of the image reaching this rescale.
+    mn, mx = sorted(min(max((v-s)/r*A + B, lo), hi) for v in ext)
+    if mx <= mn or p == 0:
+      fuse = False
+      continue
+
+    if (s, r, A, B) == (0.0, 1.0, 1.0, 0.0):
+      s, r, A, B = mn, mx-mn, p, q
+    else:
+      A, B = A/(mx-mn)*p, (B-mn)/(mx-mn)*p + q
+    lo, hi = sorted(((lo-mn)/(mx-mn)*p + q, (hi-mn)/(mx-mn)*p + q))
+    otype  = _floatType(np.dtype(otype))
+
+  if fuse and not rescale and (otype == img.dtype or otype.kind in 'iu'):
+    # Only clips, to the same or an integer type: np.clip with the combined
+    # limits.  The LUT would not give integer types wider than 32 bits.
+    if out is None or out.shape != img.shape or out.dtype != otype:
+      out = None
+    return np.clip(img, lo, hi, out=out, dtype=otype)
+
+  if fuse and _hasAffine(img):
+    return _affine(img, s, r, A, B, lo, hi, otype, out)
+
+  for fn, fargs in run:
+    img = fn(img, *fargs)
+
+  return img
+
+
 # @classf improcessor
 class basic(object):
 
@@ -96,6 +383,11 @@ class basic(object):
     self.numfuncs = 0
     self.methods  = []
     self.mtype    = []
+    self._fns     = ()
+    self._args    = ()
+    self._buffered = ()
+    self._scratch = {}
+    self._keys    = []
     self.ignore_undef = False
     self._setProcess(*args)
 
@@ -112,7 +404,10 @@ class basic(object):
 
       if callable(args[ind]) and not(inspect.isclass(args[ind])):
         self.methods.append([args[ind], args[ind+1]])
-        self.mtype.append(1)
+        if getattr(args[ind], 'inplace', False):
+          self.mtype.append(2)                  # modifies image in place
+        else:
+          self.mtype.append(1)                  # returns new image
         self.numfuncs = self.numfuncs + 1
 
       elif not self.ignore_undef:
@@ -122,6 +417,115 @@ class basic(object):
 
       ind = ind+2
 
+    # Resolve each stage once to a callable and its args (None if there are
+    # none), kept as two parallel tuples for apply.
+    # Runs of pointwise built-ins are fused into a single stage, then
+    # stages that can write into a buffer are flagged to get a scratch one
+    # when the next stage is also a built-in, as a user technique may keep
+    # a reference to its input.
+    stages = [(fn, tuple(fargs) if fargs else ()) for fn, fargs in self.methods]
+    stages = [(basic.resize, fargs) if fn is cv2.resize and len(fargs) == 1 \
+              else (fn, fargs) for fn, fargs in stages]
+    stages = self._fuseStages(stages)
+
+    self._scratch  = {}
+    self._keys     = [None] * len(stages)
+    self._fns      = tuple(fn for fn, fargs in stages)
+    self._args     = tuple(fargs if fargs else None for fn, fargs in stages)
+    self._buffered = tuple(ii < len(stages)-1 and _isOneOf(fn, self._SCRATCH_FUNCS) \
+                           and _isOneOf(stages[ii+1][0], self._SCRATCH_FUNCS) \
+                           for ii, (fn, fargs) in enumerate(stages))
+
+  #------------------------------ _fuseStages ------------------------------
+  #
+  #  @brief Replace runs of two or more pointwise built-ins with scalar
+  #         parameters by a single _pointwise stage.
+  #
+  def _fuseStages(self, stages):
+
+    fused = []
+    run   = []
+    for fn, fargs in stages + [(None, ())]:
+      ops   = None
+      toOps = next((t for f, t in _POINTWISE.items() if f is fn), None)
+      if toOps is not None:
+        try:
+          ops = toOps(*fargs)
+        except (TypeError, IndexError):         # let apply report it
+          ops = None
+        if ops is not None and any(np.ndim(p) != 0 for p in ops[1:]):
+          ops = None
+
+      if ops is not None:
+        run.append((fn, fargs, ops))
+        continue
+
+      if len(run) > 1:
+        fused.append((_pointwise, (tuple(r[2] for r in run), \
+                                   tuple(r[:2] for r in run))))
+      else:
+        fused.extend(r[:2] for r in run)
+      run = []
+      if fn is not None:
+        fused.append((fn, fargs))
+
+    return fused
+
+  #----------------------------- _scratchStage -----------------------------
+  #
+  #  @brief Run stage ii, a built-in, writing into a scratch buffer.
+  #
+  #  Buffers are kept by (ii parity, shape, type), so that the output of a
+  #  stage is never the buffer the next stage writes into.  Stage ii asks
+  #  for the buffer matching its last output, and a buffer it no longer
+  #  fits is dropped.  An output that is (part of) the stage input is not
+  #  kept, since it is not ours to overwrite, and neither is one that is
+  #  not C-contiguous, since OpenCV cannot write into it.
+  #
+  def _scratchStage(self, ii, img, fargs):
+
+    key = self._keys[ii]
+    buf = self._scratch.get(key)
+    if buf is not None and np.may_share_memory(buf, img):
+      buf = None
+    nimg = self._fns[ii](img, *fargs, out=buf)
+    if nimg is not buf:
+      self._scratch.pop(key, None)
+      key = self._keys[ii] = (ii % 2, nimg.shape, nimg.dtype)
+      if nimg.flags.c_contiguous and not np.may_share_memory(nimg, img):
+        self._scratch[key] = nimg
+
+    return nimg
+
+  #------------------------------- _release -------------------------------
+  #
+  #  @brief Copy the final image if it is (part of) a scratch buffer, which
+  #         the next apply would overwrite.
+  #
+  #  Happens when the last stage returns its input or a view of it, e.g.
+  #  np.transpose after a built-in.
+  #
+  def _release(self, img):
+
+    for buf in self._scratch.values():
+      if np.may_share_memory(img, buf):
+        return np.copy(img)
+
+    return img
+
+  #----------------------------- __getstate__ -----------------------------
+  #
+  #  @brief Leave the scratch buffers out of copies and pickles, so that a
+  #         copy starts with its own.
+  #
+  def __getstate__(self):
+
+    state = self.__dict__.copy()
+    state['_scratch'] = {}
+    state['_keys']    = [None] * len(self._fns)
+
+    return state
+
   #================================ set ================================
   #
   # @brief  Reset parameters/member variables of the improcessor.
@@ -136,6 +540,7 @@ class basic(object):
         self.args = args
         self.numfuncs = 0
         self.methods = []
+        self.mtype   = []
         self.ignore_undef = False
         self._setProcess(*args)
 
@@ -157,23 +562,34 @@ class basic(object):
   #
   # @brief  Execute the image processing sequence.
   #
+  # Without any processing methods the image is returned as is, which
+  # matches the default (identity) post.
+  #
   # @param[in]  image   The image to process.
   # @param[out] imout   The processed image.
   #
   def apply(self, image):
   
-    if image is None or self.numfuncs == 0:
-      imout = None
+    if image is None:
+      return None
+
+    if self.numfuncs == 0:                      # nothing to do
+      return image
 
-    if self.numfuncs > 0:
+    if self.mtype[0] == 2:                      # keep the input intact
       imout = np.copy(image)
-      for ii in range(self.numfuncs):
-        if not self.methods[ii][1]:             # w/o parameter
-          imout = self.methods[ii][0](imout)
-        else:                                   # w/ parameter
-          imout = self.methods[ii][0](imout, *self.methods[ii][1])
+    else:
+      imout = image
 
-    return imout
+    for ii, (fn, fargs) in enumerate(zip(self._fns, self._args)):
+      if self._buffered[ii]:                    # into a scratch buffer
+        imout = self._scratchStage(ii, imout, fargs or ())
+      elif fargs is None:                       # w/o parameter
+        imout = fn(imout)
+      else:                                     # w/ parameter
+        imout = fn(imout, *fargs)
+
+    return self._release(imout)
 
   #================================ pre ================================
   #
@@ -202,10 +618,53 @@ class basic(object):
     
     return image
 
+  #=============================== warmup ==============================
+  #
+  # @brief  Compile the numba kernels for the given image types ahead of
+  #         time, or load them from the on-disk cache.
+  #
+  # Otherwise this happens on the first large image of each type, which
+  # can stall that call for several seconds.  Does nothing without numba.
+  #
+  # @param[in]  dtypes  The image types to prepare the kernels for.
+  #
+  @classmethod
+  def warmup(cls, dtypes=(np.uint8, np.uint16, np.int16, np.int32, \
+                          np.float32, np.float64)):
+
+    if not HAVE_NUMBA:
+      return
+
+    for dtype in dtypes:
+      ivec = np.zeros(1, dtype=dtype)
+      if ivec.dtype.kind in 'iu':
+        _minmax_kernel(ivec)
+      if ivec.dtype == np.uint8:                # 8-bit images use a LUT
+        continue
+      ovec = np.empty(1, dtype=_floatType(ivec.dtype))
+      if ovec.dtype == np.float32:
+        _scale32_kernel(ivec, 0.0, 1.0, 0.0, -np.inf, np.inf, ovec)
+      else:
+        _scale_kernel(ivec, 0.0, 1.0, 1.0, 0.0, -np.inf, np.inf, ovec)
+
   #================================ clip ===============================
   #
+  # With casting='no' np.clip itself rejects an output array whose type
+  # differs from that of the result, which is cheaper than working the
+  # result type out here.
+  #
+  # @param[in]  img     The image to clip.
+  # @param[in]  limits  The (min, max) values to clip to.
+  # @param[in]  out     Optional output array, used if shape and type match.
+  #
   @staticmethod
-  def clip(img, limits):
+  def clip(img, limits, out=None):
+
+    if out is not None and out.shape == img.shape:
+      try:
+        return np.clip(img, limits[0], limits[1], out=out, casting='no')
+      except (TypeError, ValueError):           # result type or shape differ
+        pass
 
     nimg = np.clip(img, limits[0], limits[1])
   
@@ -218,31 +677,62 @@ class basic(object):
   #         pixels in the image. Finds thresholds for the value at the
   #         x-percentile and the (1-x)-percentile, then applies them.
   #
+  # The two order statistics come from a partial sort (np.partition) of a
+  # copy of the image held in the output array, which is then overwritten
+  # by the clipped image.
+  #
   # @param[in]  img     The scalar valued image.
+  # @param[in]  out     Optional output array, used if shape and type match.
   #
   @staticmethod
-  def clipTails(img, percentage=0.05):
+  def clipTails(img, percentage=0.05, out=None):
+
+    if out is None or out.shape != img.shape or out.dtype != img.dtype:
+      out = np.empty(img.shape, dtype=img.dtype)
 
-    ivec = img.flatten()
+    out[...] = img
+    ivec = out.reshape(-1)
     N    = ivec.size
-    svec = np.sort(ivec) 
+    ilo  = int(N*percentage)
+    ihi  = int(N*(1-percentage))
+    ivec.partition((ilo, ihi))
+
+    Tlo = ivec[ilo]
+    Thi = ivec[ihi]
 
-    Tlo = svec[int(N*percentage)]
-    Thi = svec[int(N*(1-percentage))]
+    nimg = np.clip(img, Tlo, Thi, out=out)
 
-    nimg = np.clip(img, Tlo, Thi)
+    return nimg
+
+  #=============================== resize ===============================
+  #
+  # @brief  Resize the image with cv2.resize.
+  #
+  # Bilinear interpolation is the default, as for cv2.resize, being the
+  # fastest choice for both shrinking and enlarging.  Pass cv2.INTER_AREA
+  # for anti-aliased shrinking.
+  #
+  # @param[in]  img           The image to resize.
+  # @param[in]  dsize         The target size as (width, height).
+  # @param[in]  interpolation The cv2 interpolation flag.
+  # @param[in]  out           Optional output array, used if shape and
+  #                           type match.
+  #
+  @staticmethod
+  def resize(img, dsize, interpolation=cv2.INTER_LINEAR, out=None):
+
+    if out is not None and not out.flags.c_contiguous:
+      out = None                                # rejected by cv2 as dst
+    nimg = cv2.resize(img, dsize, dst=out, interpolation=interpolation)
 
     return nimg
 
   #============================= normalize =============================
   #
   @staticmethod
-  def normalize(img):
+  def normalize(img, out=None):
 
-    img = np.array(img)
-    minI = np.min(img)
-    maxI = np.max(img)
-    nimg = (img-minI)/(maxI-minI)
+    nimg = _rescale(img, 1, 0, out)
 
     return nimg
 
@@ -258,32 +748,49 @@ class basic(object):
   #=============================== scale ===============================
   #
   @staticmethod
-  def scale(img, scparms):
+  def scale(img, scparms, out=None):
 
-    minI = np.min(img)
-    maxI = np.max(img)
-    nimg = (scparms[1]-scparms[0])*(img-minI)/(maxI-minI) + scparms[0]
+    nimg = _rescale(img, scparms[1]-scparms[0], scparms[0], out)
 
     return nimg
 
   #============================= scaleabout ============================
   #
   @staticmethod
-  def scaleabout(img, scparms):
+  def scaleabout(img, scparms, out=None):
 
-    minI = np.min(img)
-    maxI = np.max(img)
-    nimg = scparms[1]*(img-minI)/(maxI-minI) + scparms[0] - scparms[1]/2
+    nimg = _rescale(img, scparms[1], scparms[0] - scparms[1]/2, out)
 
     return nimg
 
   # ============================= to_uint8 ============================
   #
-
+  # @param[in]  img     The image to convert.
+  # @param[in]  out     Optional output array, used if its shape matches.
+  #
   @staticmethod
-  def to_uint8(img):
+  def to_uint8(img, out=None):
 
-    nimg = img.astype('uint8')
+    if out is None or out.shape != img.shape or out.dtype != np.uint8:
+      return img.astype('uint8')
+
+    np.copyto(out, img, casting='unsafe')
+
+    return out
+
+  # Built-ins that accept an out argument for writing into scratch buffers.
+  # Subclasses add their own.
+  _SCRATCH_FUNCS = frozenset(fn.__func__ for fn in (clip, clipTails, resize, \
+                             normalize, scale, scaleabout, to_uint8)) \
+                   | {_pointwise}
 
-    return nimg
 
+# Pointwise built-ins that can be fused, mapping their arguments to the
+# (op, p, q) used by _pointwise: op 0 clips to [p, q], op 1 rescales the
+# range of the image to [q, p+q].
+_POINTWISE = {
+  basic.clip       : lambda limits: (0, limits[0], limits[1]),
+  basic.normalize  : lambda: (1, 1, 0),
+  basic.scale      : lambda scparms: (1, scparms[1]-scparms[0], scparms[0]),
+  basic.scaleabout : lambda scparms: (1, scparms[1], scparms[0]-scparms[1]/2),
+}
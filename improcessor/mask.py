@@ -27,6 +27,14 @@
 #
 # If there are no optional arguments, then do not pass anything.
 #
+# As for improcessor.basic, the mask is handed to the first technique as
+# is, unless that technique is flagged with `inplace = True`.  Should the
+# techniques return the input mask itself, as getLargestCC does for an
+# empty mask, apply returns a copy of it instead.  With caching, the mask
+# is copied first, so that no cached result is the input mask.  Scratch
+# buffers are reused between calls as for improcessor.basic, so an instance
+# should not be shared by threads that apply it at the same time.
+#
 # Possible functions include any function that exists in the class
 # invocation or function setting scope.
 #
@@ -73,48 +81,199 @@
 #=========================== improcessor.mask ===========================
 
 import numpy as np
-import inspect
-import types
-from skimage.measure import label
 
 import cv2
 
-from improcessor.basic import basic
+from improcessor.basic import basic, _isOneOf
+
+
+def _outBuffer(out, mask):
+  """Return out if a result for mask can be written into it, else None.
+
+  Args:
+      out (np.ndarray. (H, W)): The candidate output array, or None
+      mask (np.ndarray. (H, W)): The input mask
+  """
+  if out is not None and out.shape == mask.shape and out.dtype == np.bool_ \
+      and out.flags.c_contiguous:
+    return out
+  return None
+
+
+def _uint8View(mask):
+  """Return the mask as a 0/1 uint8 array, a view of it if the mask is bool."""
+  if mask.dtype != np.bool_:
+    mask = mask != 0
+  return mask.view(np.uint8)
+
+
+def _isBox(kernel):
+  """Whether a kernel is an all-ones rectangle of odd width and height."""
+  return kernel.ndim == 2 and kernel.shape[0] % 2 == 1 \
+         and kernel.shape[1] % 2 == 1 and kernel.all()
+
+
+def _morphology(op, mask, kernel, out=None):
+  """Apply a cv2.morphologyEx operation to a binary mask.
+
+  A bool mask and the output are handed to OpenCV as 0/1 uint8 views, which
+  avoids conversion passes.  Other masks are converted with mask != 0.
+  Erosion with a kernel that leaves out its anchor can produce the 255
+  border value, which is then mapped back to 1.
+
+  Args:
+      op (int): The cv2.MORPH_* operation
+      mask (np.ndarray. (H, W)): The input mask
+      kernel (np.ndarray. (Hk, Wk)): The kernel for the operation
+      out (np.ndarray. (H, W), optional): Output array, used if shape and type match
+
+  Returns:
+      maskOut (np.ndarray. (H, W)): The mask after the operation
+  """
+  kernel = np.ascontiguousarray(kernel, dtype=np.uint8)
+  out    = _outBuffer(out, mask)
+  dst    = None if out is None else out.view(np.uint8)
+  nmask  = cv2.morphologyEx(_uint8View(mask), op, kernel, dst=dst)
+
+  k = kernel.reshape(kernel.shape[0], -1) if kernel.size > 0 else None
+  if k is None or not k[k.shape[0]//2, k.shape[1]//2]:
+    np.minimum(nmask, 1, out=nmask)
+
+  return out if nmask is dst else nmask.view(bool)
+
+
+def _largestLabel(labels, stats):
+  """Return the label of the largest component, see mask.getLargestCC.
+
+  OpenCV does not number the components in raster order, so ties are broken
+  explicitly by the position of their first pixel, which lies on the top row
+  of their bounding box.
+
+  Args:
+      labels (np.ndarray. (H, W)): The labels from cv2.connectedComponentsWithStats
+      stats (np.ndarray. (N, 5)): The statistics from cv2.connectedComponentsWithStats
+  """
+  areas = stats[1:, cv2.CC_STAT_AREA]
+  ties  = np.flatnonzero(areas == areas.max()) + 1
+  if ties.size == 1:
+    return ties[0]
+
+  def first(l):
+    top = stats[l, cv2.CC_STAT_TOP]
+    return top, np.argmax(labels[top] == l)
+
+  return min(ties, key=first)
+
 
 class mask(basic):
 
   def __init__(self, *args):
       super().__init__(*args)
       self.cache = []
+
+  def _fuseStages(self, stages):
+    """Merge consecutive morphology steps with box kernels, see basic._fuseStages.
+
+    All-ones kernels of odd size compose exactly, also at the image border.
+    Two erosions (dilations) are one erosion (dilation) with the combined box,
+    and an erosion then dilation with the same box is an opening (the other
+    way round a closing).  A single pass with the larger box is cheaper.
+
+    The kernels of the morphology operations are converted once to the
+    contiguous uint8 arrays that OpenCV works with, instead of on every call.
+    The methods as given, returned by get('processing'), keep the originals.
+    """
+    stages = [(fn, (np.ascontiguousarray(fargs[0], dtype=np.uint8),) + fargs[1:]) \
+              if fargs and _isOneOf(fn, self._MORPH_FUNCS) else (fn, fargs) \
+              for fn, fargs in stages]
+
+    fused = []
+    for fn, fargs in super()._fuseStages(stages):
+      if fused and _isOneOf(fn, self._MORPH_FUNCS) \
+          and _isOneOf(fused[-1][0], self._MORPH_FUNCS) \
+          and len(fargs) == 1 and len(fused[-1][1]) == 1 \
+          and _isBox(fargs[0]) and _isBox(fused[-1][1][0]):
+        prev, (pk,) = fused[-1]
+        k = fargs[0]
+        if prev is fn and fn in (mask.erode, mask.dilate):
+          box = np.ones((pk.shape[0]+k.shape[0]-1, pk.shape[1]+k.shape[1]-1), np.uint8)
+          fused[-1] = (fn, (box,))
+          continue
+        if pk.shape == k.shape and (prev, fn) == (mask.erode, mask.dilate):
+          fused[-1] = (mask.opening, (k,))
+          continue
+        if pk.shape == k.shape and (prev, fn) == (mask.dilate, mask.erode):
+          fused[-1] = (mask.closing, (k,))
+          continue
+      fused.append((fn, fargs))
+
+    return fused
     
-  def apply(self, mask, cache=False):
+  def apply(self, mask, cache=False, out=None):
     """Execute the mask processing sequence.
 
+    Intermediate results of the built-in operations go to scratch buffers
+    that are reused by later calls, unless they are cached.
+
     Args:
-        mask (np.ndarray. (H, W)): The mask to process
+        mask (np.ndarray. (H, W)): The mask to process, bool or unsigned integer
+            with nonzero values as foreground
         cache (bool, optional): Cache the results in the process or not. Defaults to False.
+        out (np.ndarray. (H, W), optional): Array for the final result, used if the
+            last operation is a built-in one and shape and type match. Defaults to None.
 
     Returns:
         maskOut: The processed mask
+
+    Raises:
+        TypeError: If the mask is not a 2D bool or unsigned integer array
     """
   
     if mask is None or self.numfuncs == 0:
-      maskOut = None
+      return None
 
-    if self.numfuncs > 0:
-      # sanity check that input is a binary mask
-      assert len(mask.shape) == 2 and (mask.dtype == bool), \
-        "The input mask is expected to be a binary array with the shape like (H, W), \
-        now the input dtype and shape are: {} and {}".format(mask.dtype, mask.shape)
+    # sanity check that input is a binary mask
+    if mask.ndim != 2 or mask.dtype.kind not in 'bu':
+      raise TypeError("The input mask is expected to be a binary array with the "
+        "shape like (H, W), now the input dtype and shape are: {} and {}".format(
+        mask.dtype, mask.shape))
+    if mask.dtype != np.bool_:                # nonzero is foreground
+      maskOut = mask != 0
+    elif self.mtype[0] == 2 or cache:         # keep the input intact
       maskOut = np.copy(mask)
-      for ii in range(self.numfuncs):
-        if not self.methods[ii][1]:             # w/o parameter
-          maskOut = self.methods[ii][0](maskOut)
-        else:                                   # w/ parameter
-          maskOut = self.methods[ii][0](maskOut, *self.methods[ii][1])
-        
-        if cache:
-          self.cache.append(maskOut)
+    else:
+      maskOut = mask
+
+    if len(self._fns) == 1 and not cache:     # single step, skip the loop
+      fn, fargs = self._fns[0], self._args[0] or ()
+      if out is not None and _isOneOf(fn, self._SCRATCH_FUNCS):
+        return fn(maskOut, *fargs, out=out)
+      maskOut = fn(maskOut, *fargs)
+      return np.copy(maskOut) if np.may_share_memory(maskOut, mask) else maskOut
+
+    # The stages resolved by basic may reuse buffers between calls, which
+    # would overwrite cached results, so caching runs the methods as given.
+    if cache:
+      stages = self.methods
+    else:
+      stages = zip(self._fns, self._args)
+
+    last = len(self.methods if cache else self._fns) - 1
+    for ii, (fn, fargs) in enumerate(stages):
+      fargs = fargs or ()
+      if ii == last and out is not None and _isOneOf(fn, self._SCRATCH_FUNCS):
+        maskOut = fn(maskOut, *fargs, out=out)
+      elif not cache and self._buffered[ii]:
+        maskOut = self._scratchStage(ii, maskOut, fargs)
+      else:
+        maskOut = fn(maskOut, *fargs)
+      
+      if cache:
+        self.cache.append(maskOut)
+
+    maskOut = self._release(maskOut)
+    if np.may_share_memory(maskOut, mask):    # never hand back the input
+      maskOut = np.copy(maskOut)
 
     return maskOut
   
@@ -129,77 +288,105 @@ class mask(basic):
     return self.cache
   
   @staticmethod
-  def getLargestCC(mask):
+  def getLargestCC(mask, out=None):
     """Return the largest connected component of a binary mask
-    If the mask has no connected components (all zero), will be directly returned
+    If the mask has no connected components (all zero), will be directly returned,
+    or written into out when that is given
+
+    The components are 8-connected. Their areas come with the labeling
+    (cv2.connectedComponentsWithStats), so the labels are only read once more
+    to extract the largest one. An empty mask skips the labeling, and a mask
+    with a single component is its own largest one. Among components of equal
+    area, the one whose first pixel comes first in raster order is returned.
 
     @param[in]      mask                    The input binary mask
+    @param[in]      out                     Optional output array, used if shape and type match
     @param[out]     largestCC               The binary mask of the largest connected component
                                             The shape is the same as the input mask
     """
-    labels = label(mask)
-    if labels.max() == 0:
+    if not mask.any():
         Warning("The input mask has no connected component. \
             Will be directly returned")
-        largestCC = mask
+        out = _outBuffer(out, mask)
+        if out is None:
+            return mask
+        out.fill(False)
+        return out
+
+    num, labels, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+        _uint8View(mask), 8, cv2.CV_32S, cv2.CCL_BBDT)
+    if num == 2:
+        largestCC = np.not_equal(mask, 0, out=_outBuffer(out, mask))
     else:
-        largestCC = labels == np.argmax(np.bincount(labels.flat)[1:])+1
+        largestCC = np.equal(labels, _largestLabel(labels, stats), \
+                             out=_outBuffer(out, mask))
     return largestCC
 
   @staticmethod
-  def erode(mask, kernel):
+  def erode(mask, kernel, out=None):
     """Morphological erosion operation
 
     Args:
         mask (np.ndarray. (H, W)): The input mask
         kernel (np.ndarray. (Hk, Wk)): The kernel for morphological erosion
+        out (np.ndarray. (H, W), optional): Output array, used if shape and type match
     
     Returns:
         maskErode (np.ndarray. (H, W)): The mask after erosion
     """
-    maskErode = cv2.erode(mask.astype(np.uint8), kernel.astype(np.uint8)).astype(bool)
+    maskErode = _morphology(cv2.MORPH_ERODE, mask, kernel, out)
     return maskErode
   
   @staticmethod
-  def dilate(mask, kernel):
+  def dilate(mask, kernel, out=None):
     """Morphological dilation operation
 
     Args:
         mask (np.ndarray. (H, W)): The input mask
         kernel (np.ndarray. (Hk, Wk)): The kernel for morphological dilation
+        out (np.ndarray. (H, W), optional): Output array, used if shape and type match
 
     Returns:
         maskDilate [np.ndarray. (H, W)]: The mask after dilation
     """
-    maskDilate =cv2.dilate(mask.astype(np.uint8), kernel.astype(np.uint8)).astype(bool)
+    maskDilate = _morphology(cv2.MORPH_DILATE, mask, kernel, out)
     return maskDilate
 
   @staticmethod
-  def opening(mask, kernel):
+  def opening(mask, kernel, out=None):
     """Morphological opening operation(erode then dilate)
     This operation can remove small blobs in the mask
 
     Args:
         mask (np.ndarray. (H, W)): The input mask
         kernel (np.ndarray. (Hk, Wk)): The kernel for morphological opening
+        out (np.ndarray. (H, W), optional): Output array, used if shape and type match
 
     Returns:
         maskOpening [np.ndarray. (H, W)]: The mask after Opening operation
     """
-    maskOpening = cv2.morphologyEx(mask.astype(np.uint8), cv2.MORPH_OPEN, kernel.astype(np.uint8)).astype(bool)
+    maskOpening = _morphology(cv2.MORPH_OPEN, mask, kernel, out)
     return maskOpening
 
   @staticmethod
-  def closing(mask, kernel):
+  def closing(mask, kernel, out=None):
     """Morphological closing operation(dilate then erode)
     This operation can fill the small holes in the mask
 
     Args:
         mask (np.ndarray. (H, W)): The input mask
         kernel (np.ndarray. (Hk, Wk)): The kernel for morphological closing
+        out (np.ndarray. (H, W), optional): Output array, used if shape and type match
 
     Returns:
         maskClosing [np.ndarray. (H, W)]: The mask after Closing operation
     """
-    maskClosing = cv2.morphologyEx(mask.astype(np.uint8), cv2.MORPH_CLOSE, kernel.astype(np.uint8)).astype(bool)
-    return maskClosing 
+    maskClosing = _morphology(cv2.MORPH_CLOSE, mask, kernel, out)
+    return maskClosing
+
+  # Built-ins that accept an out argument for writing into scratch buffers.
+  _SCRATCH_FUNCS = basic._SCRATCH_FUNCS | {fn.__func__ for fn in \
+                   (getLargestCC, erode, dilate, opening, closing)}
+
+  # Built-ins taking a morphology kernel as their first argument.
+  _MORPH_FUNCS = frozenset(fn.__func__ for fn in (erode, dilate, opening, closing))
@@ -10,6 +10,5 @@ setup(
         "numpy",
         "matplotlib",
         "opencv-contrib-python",
-        "scikit-image",
     ],
 )
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+#=========================== testBasic04_reuse ===========================
+#
+# @brief    Apply processing sequences repeatedly to images of several
+#           types and memory layouts, and compare each result with that
+#           of running the methods one after the other.  Exercises the
+#           fusion of pointwise built-ins, the reuse of scratch buffers
+#           between calls, and the out argument of the built-ins.
+#
+#=========================== testBasic04_reuse ===========================
+
+#
+# @file     testBasic04_reuse.py
+#
+#!NOTE:
+#!  Indent is set to 2 spaces.
+#!  Tab is set to 4 spaces with conversion to spaces.
+#
+# @quit
+#=========================== testBasic04_reuse ===========================
+
+#==[0] Prep environment
+#
+import cv2
+import numpy as np
+import improcessor.basic as improcessor
+
+basic = improcessor.basic
+rng   = np.random.default_rng(0)
+
+
+def unfused(improc, image):
+  for fn, fargs in improc.get('processing'):
+    image = fn(image, *fargs)
+  return image
+
+
+def same(a, b):
+  a = np.asarray(a)
+  b = np.asarray(b)
+  if a.dtype != b.dtype or a.shape != b.shape:
+    return False
+  if a.dtype.kind in 'iu':                      # rounding of fused stages
+    return np.abs(a.astype(float) - b.astype(float)).max(initial=0) <= 1
+  return np.allclose(a, b, rtol=1e-4, atol=1e-4, equal_nan=True)
+
+
+def layouts(image):
+  yield image
+  yield np.asfortranarray(image)
+  yield image.T
+  yield image[::2, 1::3]
+
+
+#==[1] The processing sequences, the last ones reported as bugs
+#
+sequences = [
+  (basic.normalize, ()),
+  (basic.clip, ((20, 200),), basic.scale, ((0, 1),)),
+  (basic.scale, ((0, 200),), basic.to_uint8, ()),
+  (basic.clipTails, (), basic.normalize, (), basic.scaleabout, ((0, 2),)),
+  (cv2.resize, ((100, 80),), basic.clip, ((50, 150),), basic.to_uint8, ()),
+  (basic.clip, ((np.int64(10), np.int64(200)),), basic.clip, ((20, 100),)),
+  (basic.scale, ((0, 100),), np.transpose, (), basic.clip, ((0, 50),), \
+   basic.to_uint8, ()),
+  (basic.normalize, (), lambda x: x, ()),
+  (basic.normalize, (), np.transpose, ()),
+]
+
+#==[2] Apply each sequence repeatedly, keeping the results of earlier calls
+#
+failed = 0
+for seq in sequences:
+  improc = basic(*seq)
+  for dtype in (np.uint8, np.uint16, np.float32, np.float64):
+    for shape in ((64, 48), (300, 400)):
+      frames = [rng.integers(0, 256, shape).astype(dtype), \
+                np.full(shape, 7, dtype=dtype)]
+      results = []
+      for image in [im for frame in frames for im in layouts(frame)] * 2:
+        results.append((improc.apply(image), unfused(improc, image)))
+      for outIm, refIm in results:
+        if not same(outIm, refIm):
+          failed += 1
+          print('Mismatch:', [getattr(s, '__name__', s) for s in seq[::2]], \
+                np.dtype(dtype).name, shape)
+          break
+
+#==[3] The out argument of the built-ins, with mismatched layouts
+#
+image = rng.integers(0, 4000, (300, 400)).astype(np.uint16)
+out   = np.asfortranarray(np.empty((300, 400), dtype=np.float32))
+failed += not same(basic.scale(image, (0, 100), out=out), basic.scale(image, (0, 100)))
+image = image.astype(np.uint8)
+failed += not same(basic.scale(image, (0, 100), out=out), basic.scale(image, (0, 100)))
+out   = np.asfortranarray(np.empty((80, 100), dtype=np.uint8))
+failed += not same(basic.resize(image, (100, 80), out=out), basic.resize(image, (100, 80)))
+
+#==[4] A technique of the user may keep references to its input
+#
+kept   = []
+improc = basic(basic.clip, ((0, 100),), lambda x: kept.append(x) or x, ())
+improc.apply(np.full((4, 4), 5))
+improc.apply(np.full((4, 4), 50))
+failed += not (kept[0] == 5).all()
+
+#==[5] Report
+#
+if failed:
+  print('Error found!', failed, 'mismatches')
+else:
+  print('All results match the unfused processing.')
+
+#
+#=========================== testBasic04_reuse ===========================
@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+#========================= testMask02_reuse =========================
+#
+# @brief    Apply mask processing sequences repeatedly to masks of
+#           several types and memory layouts, and compare each result
+#           with that of running the methods one after the other.
+#           Exercises the merging of morphology steps, the reuse of
+#           scratch buffers between calls, and the out argument.
+#
+#========================= testMask02_reuse =========================
+#
+# @file     testMask02_reuse.py
+#
+#!NOTE:
+#!  Indent is set to 2 spaces.
+#!  Tab is set to 4 spaces with conversion to spaces.
+#
+#========================= testMask02_reuse =========================
+
+#==[0] environment
+import improcessor.mask as maskproc
+import numpy as np
+import cv2
+import os
+
+fPath = os.path.dirname(os.path.abspath(__file__))
+M     = maskproc.mask
+rng   = np.random.default_rng(0)
+
+
+def unfused(proc, mask):
+  mask = mask != 0
+  for fn, fargs in proc.get('processing'):
+    mask = fn(mask, *fargs)
+  return mask
+
+
+def layouts(mask):
+  yield mask
+  yield np.asfortranarray(mask)
+  yield mask.T
+  yield mask.astype(np.uint8) * 255
+
+
+#==[1] input data
+image  = cv2.imread(os.path.join(fPath, "binary_i.png"), cv2.IMREAD_GRAYSCALE)
+masks  = [image > 1, np.zeros(image.shape, dtype=bool), \
+          rng.random((120, 90)) < 0.45]
+masks += [cv2.erode(masks[0].astype(np.uint8), np.ones((9, 9), np.uint8)) > 0]
+
+#==[2] Define the sequences of operations, the last ones reported as bugs
+box3  = np.ones((3, 3), dtype=bool)
+box5  = np.ones((5, 5), dtype=np.float64)
+cross = cv2.getStructuringElement(cv2.MORPH_CROSS, (5, 5))
+sequences = [
+  (M.getLargestCC, ()),
+  (M.getLargestCC, (), M.erode, (box5, ), M.dilate, (box5, )),
+  (M.dilate, (box3, ), M.erode, (box3, ), M.getLargestCC, ()),
+  (M.erode, (box3, ), M.erode, (box5, ), M.dilate, (cross, )),
+  (M.opening, (cross, ), M.closing, (box3, ), M.getLargestCC, ()),
+  (M.erode, (box5, ), M.getLargestCC, ()),
+  (M.erode, (box5, ), np.transpose, ()),
+]
+
+#==[3] Apply each sequence repeatedly, keeping the results of earlier calls
+failed = 0
+for seq in sequences:
+  proc = M(*seq)
+  for cache in (False, True):
+    results = []
+    for mask in [m for mask in masks for m in layouts(mask)] * 2:
+      out = np.empty(mask.shape, dtype=bool)
+      results.append((proc.apply(mask, cache=cache), unfused(proc, mask)))
+      results.append((proc.apply(mask, cache=cache, out=out), unfused(proc, mask)))
+    for outMask, refMask in results:
+      if outMask.dtype != np.bool_ or not np.array_equal(outMask, refMask):
+        failed += 1
+        print("Mismatch: {} cache={}".format( \
+              [getattr(s, '__name__', s) for s in seq[::2]], cache))
+        break
+
+#==[4] The built-ins on their own, with masks that are not bool
+mask = masks[2]
+for fn, fargs in ((M.getLargestCC, ()), (M.erode, (box3, )), (M.dilate, (box3, )), \
+                  (M.opening, (cross, )), (M.closing, (cross, ))):
+  for other in (mask.astype(np.float64), mask.astype(np.uint8) * 255):
+    if not np.array_equal(fn(other, *fargs), fn(mask, *fargs)):
+      failed += 1
+      print("Mismatch: {} on {} mask".format(fn.__name__, other.dtype))
+
+#==[5] The input mask is never returned, even when the steps return it
+empty = np.zeros((40, 30), dtype=bool)
+for seq in ((M.getLargestCC, ()), (M.getLargestCC, (), M.getLargestCC, ())):
+  for cache in (False, True):
+    if np.may_share_memory(M(*seq).apply(empty, cache=cache), empty):
+      failed += 1
+      print("Input mask returned: {} cache={}".format( \
+            [s.__name__ for s in seq[::2]], cache))
+
+#==[6] Report
+if failed:
+  print("Error found! {} mismatches".format(failed))
+else:
+  print("All results match the unfused processing.")